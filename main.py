@@ -1,16 +1,23 @@
 
-from flask import Flask
-from threading import Thread
+from flask import Flask, request
+from threading import Thread, Lock
+from collections import deque
+import re
 import time
 from datetime import datetime, timedelta
 import pytz
 from twilio.rest import Client
+from twilio.twiml.messaging_response import MessagingResponse
+from twilio.request_validator import RequestValidator
+from werkzeug.middleware.proxy_fix import ProxyFix
 import os
 import requests
 import json
 from bs4 import BeautifulSoup
 
 app = Flask(__name__)
+# Trust the hosting proxy's scheme/host headers so request.url matches the URL Twilio signs
+app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
 # Load secrets from environment variables
 account_sid = os.environ['TWILIO_ACCOUNT_SID']
@@ -19,6 +26,22 @@ from_whatsapp_number = os.environ['TWILIO_FROM_NUMBER']
 to_whatsapp_number = os.environ['TO_NUMBER']
 
 client = Client(account_sid, auth_token)
+request_validator = RequestValidator(auth_token)
+
+# Parsed stage results keyed by stage number, filled in whenever an update is built.
+# Inbound WhatsApp queries are answered from here so they never trigger a scrape.
+stage_results_cache = {}
+stage_results_lock = Lock()
+
+# Per-sender rate limit for inbound WhatsApp queries
+QUERY_RATE_LIMIT = 5          # max queries per sender...
+QUERY_RATE_WINDOW = 60        # ...within this many seconds
+MAX_TRACKED_SENDERS = 1000    # prune idle senders once this many are tracked
+
+SCRAPE_TIMEOUT = 15           # seconds before a results page request is abandoned
+RECENT_STAGE_DAYS = 2         # daily cache refresh only retries stages raced this recently
+query_timestamps = {}
+query_timestamps_lock = Lock()
 
 def fetch_giro_stage_results(stage_num):
     """
@@ -28,7 +51,7 @@ def fetch_giro_stage_results(stage_num):
         url = f"https://www.cyclingnews.com/races/giro-d-italia-2025/stage-{stage_num}/results/"
         response = requests.get(url, headers={
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        }, timeout=SCRAPE_TIMEOUT)
         
         if response.status_code != 200:
             print(f"Error fetching results: HTTP {response.status_code}")
@@ -145,6 +168,141 @@ def fetch_giro_stage_results(stage_num):
         print(f"Error fetching stage results: {str(e)}")
         return None
 
+# Mapping of stage dates to stage numbers (assuming 2025 Giro)
+GIRO_STAGES = {
+    # First week
+    datetime(2025, 5, 3).date(): 1,  # Stage 1
+    datetime(2025, 5, 4).date(): 2,  # Stage 2
+    datetime(2025, 5, 5).date(): 3,  # Stage 3
+    datetime(2025, 5, 6).date(): 4,  # Stage 4
+    datetime(2025, 5, 7).date(): 5,  # Stage 5
+    datetime(2025, 5, 8).date(): 6,  # Stage 6
+    datetime(2025, 5, 9).date(): 7,  # Stage 7
+    datetime(2025, 5, 10).date(): 8,  # Stage 8
+    datetime(2025, 5, 11).date(): 9,  # Stage 9
+    # Second week
+    datetime(2025, 5, 13).date(): 10, # Stage 10
+    datetime(2025, 5, 14).date(): 11, # Stage 11
+    datetime(2025, 5, 15).date(): 12, # Stage 12
+    datetime(2025, 5, 16).date(): 13, # Stage 13
+    datetime(2025, 5, 17).date(): 14, # Stage 14
+    datetime(2025, 5, 18).date(): 15, # Stage 15
+    # Third week
+    datetime(2025, 5, 20).date(): 16, # Stage 16
+    datetime(2025, 5, 21).date(): 17, # Stage 17
+    datetime(2025, 5, 22).date(): 18, # Stage 18
+    datetime(2025, 5, 23).date(): 19, # Stage 19
+    datetime(2025, 5, 24).date(): 20, # Stage 20
+    datetime(2025, 5, 25).date(): 21, # Stage 21 (final)
+}
+
+# Fallback stage data used when web scraping fails
+STATIC_STAGE_DATA = {
+    1: {
+        "stage_num": "1",
+        "stage_winner": "Filippo Ganna",
+        "team": "INEOS Grenadiers",
+        "second": "Remco Evenepoel",
+        "third": "Tadej Pogačar",
+        "time": "10m 15s",
+        "lidl_trek_highlight": "Mads Pedersen finished 8th in opening time trial",
+        "team_standing": "5th in Team Classification",
+        "team_safety": "All riders finished safely",
+        "pink_jersey": "Filippo Ganna",
+        "points_jersey": "Filippo Ganna",
+        "kom_jersey": "N/A",
+        "youth_jersey": "Remco Evenepoel",
+        "top_story": "Ganna powers to victory in opening time trial",
+        "link": "https://www.cyclingnews.com/races/giro-d-italia-2025/"
+    },
+    2: {
+        "stage_num": "2",
+        "stage_winner": "Tim Merlier",
+        "team": "Soudal Quick-Step",
+        "second": "Jonathan Milan",
+        "third": "Olav Kooij",
+        "time": "3h 45m 22s",
+        "lidl_trek_highlight": "Jonathan Milan secured 2nd place in the sprint finish",
+        "team_standing": "6th in Team Classification",
+        "team_safety": "All riders finished safely",
+        "pink_jersey": "Filippo Ganna",
+        "points_jersey": "Tim Merlier",
+        "kom_jersey": "Michael Matthews",
+        "youth_jersey": "Remco Evenepoel",
+        "top_story": "Merlier claims victory in thrilling Stage 2 sprint finish",
+        "link": "https://www.cyclingnews.com/races/giro-d-italia-2025/"
+    },
+    3: {
+        "stage_num": "3",
+        "stage_winner": "Biniam Girmay",
+        "team": "Intermarché-Wanty",
+        "second": "Jonathan Milan",
+        "third": "Kaden Groves",
+        "time": "4h 05m 23s",
+        "lidl_trek_highlight": "Jonathan Milan took 2nd place and keeps points jersey",
+        "team_standing": "4th in Team Classification",
+        "team_safety": "All riders finished safely",
+        "pink_jersey": "Filippo Ganna",
+        "points_jersey": "Jonathan Milan",
+        "kom_jersey": "Michael Matthews",
+        "youth_jersey": "Remco Evenepoel",
+        "top_story": "Girmay outsprints Milan in thrilling finish",
+        "link": "https://www.cyclingnews.com/races/giro-d-italia-2025/"
+    },
+    4: {
+        "stage_num": "4",
+        "stage_winner": "Tadej Pogačar",
+        "team": "UAE Team Emirates",
+        "second": "Remco Evenepoel",
+        "third": "Geraint Thomas",
+        "time": "4h 23m 12s",
+        "lidl_trek_highlight": "Giulio Ciccone finished 5th on first mountain stage",
+        "team_standing": "4th in Team Classification",
+        "team_safety": "All riders finished safely",
+        "pink_jersey": "Tadej Pogačar",
+        "points_jersey": "Jonathan Milan",
+        "kom_jersey": "Tadej Pogačar",
+        "youth_jersey": "Remco Evenepoel",
+        "top_story": "Pogačar takes pink with dominant climb",
+        "link": "https://www.cyclingnews.com/races/giro-d-italia-2025/"
+    },
+    5: {
+        "stage_num": "5",
+        "stage_winner": "Tim Merlier",
+        "team": "Soudal Quick-Step",
+        "second": "Jonathan Milan",
+        "third": "Biniam Girmay",
+        "time": "3h 56m 44s",
+        "lidl_trek_highlight": "Milan strengthens grip on points jersey with 2nd place",
+        "team_standing": "4th in Team Classification",
+        "team_safety": "All riders finished safely",
+        "pink_jersey": "Tadej Pogačar",
+        "points_jersey": "Jonathan Milan",
+        "kom_jersey": "Tadej Pogačar",
+        "youth_jersey": "Remco Evenepoel",
+        "top_story": "Merlier edges Milan in sprint finish",
+        "link": "https://www.cyclingnews.com/races/giro-d-italia-2025/"
+    },
+    # Add more stages as needed - for now I've included 5 stages
+    # Additional stages added based on real results, will add more as race progresses
+}
+
+def get_completed_stages(today):
+    """Return the stage numbers raced on or before the given date, in order"""
+    return sorted(stage for date, stage in GIRO_STAGES.items() if date <= today)
+
+def get_stage_date(stage_num):
+    """Return the race date for a stage"""
+    for date, stage in GIRO_STAGES.items():
+        if stage == stage_num:
+            return date
+    return None
+
+def get_stage_date_str(stage_num):
+    """Return the formatted race date for a stage"""
+    date = get_stage_date(stage_num)
+    return date.strftime("%A %d %B") if date else None
+
 def get_giro_update():
     """
     Get the Giro d'Italia stage information based on the current date.
@@ -152,189 +310,242 @@ def get_giro_update():
     today = datetime.now(pytz.timezone("Australia/Melbourne"))
     date_str = today.strftime("%A %d %B")
     
-    # Mapping of stage dates to stage numbers (assuming 2025 Giro)
-    giro_stages = {
-        # First week
-        datetime(2025, 5, 3).date(): 1,  # Stage 1
-        datetime(2025, 5, 4).date(): 2,  # Stage 2
-        datetime(2025, 5, 5).date(): 3,  # Stage 3
-        datetime(2025, 5, 6).date(): 4,  # Stage 4
-        datetime(2025, 5, 7).date(): 5,  # Stage 5
-        datetime(2025, 5, 8).date(): 6,  # Stage 6
-        datetime(2025, 5, 9).date(): 7,  # Stage 7
-        datetime(2025, 5, 10).date(): 8,  # Stage 8
-        datetime(2025, 5, 11).date(): 9,  # Stage 9
-        # Second week
-        datetime(2025, 5, 13).date(): 10, # Stage 10
-        datetime(2025, 5, 14).date(): 11, # Stage 11
-        datetime(2025, 5, 15).date(): 12, # Stage 12
-        datetime(2025, 5, 16).date(): 13, # Stage 13
-        datetime(2025, 5, 17).date(): 14, # Stage 14
-        datetime(2025, 5, 18).date(): 15, # Stage 15
-        # Third week
-        datetime(2025, 5, 20).date(): 16, # Stage 16
-        datetime(2025, 5, 21).date(): 17, # Stage 17
-        datetime(2025, 5, 22).date(): 18, # Stage 18
-        datetime(2025, 5, 23).date(): 19, # Stage 19
-        datetime(2025, 5, 24).date(): 20, # Stage 20
-        datetime(2025, 5, 25).date(): 21, # Stage 21 (final)
-    }
-    
-    # Determine current stage
-    stage_date = today.date()
-    actual_stage_number = None
-    
     # Determine the last completed stage
-    completed_dates = [date for date in giro_stages.keys() if date <= stage_date]
-    if completed_dates:
-        last_completed_date = max(completed_dates)
-        actual_stage_number = giro_stages[last_completed_date]
+    completed_stages = get_completed_stages(today.date())
+    if completed_stages:
+        stage_num = completed_stages[-1]
     else:
         # If no stages completed yet (before the Giro starts)
-        actual_stage_number = 2  # Default to stage 2 for testing before Giro starts
-    
-    stage_num = actual_stage_number
+        stage_num = 2  # Default to stage 2 for testing before Giro starts
     
     # Try to fetch live data first
     live_data = fetch_giro_stage_results(stage_num)
     if live_data:
         print(f"Successfully fetched live data for Stage {stage_num}")
+        cache_stage_results(live_data)
         live_data["date"] = date_str
         return live_data
     
     print(f"Could not fetch live data, falling back to static data for Stage {stage_num}")
     
-    # Fallback to static data if web scraping fails
-    stage_data = {
-        1: {
-            "stage_num": "1",
-            "stage_winner": "Filippo Ganna",
-            "team": "INEOS Grenadiers",
-            "second": "Remco Evenepoel",
-            "third": "Tadej Pogačar",
-            "time": "10m 15s",
-            "lidl_trek_highlight": "Mads Pedersen finished 8th in opening time trial",
-            "team_standing": "5th in Team Classification",
-            "team_safety": "All riders finished safely",
-            "pink_jersey": "Filippo Ganna",
-            "points_jersey": "Filippo Ganna",
-            "kom_jersey": "N/A",
-            "youth_jersey": "Remco Evenepoel",
-            "top_story": "Ganna powers to victory in opening time trial",
-            "link": "https://www.cyclingnews.com/races/giro-d-italia-2025/"
-        },
-        2: {
-            "stage_num": "2",
-            "stage_winner": "Tim Merlier",
-            "team": "Soudal Quick-Step",
-            "second": "Jonathan Milan",
-            "third": "Olav Kooij",
-            "time": "3h 45m 22s",
-            "lidl_trek_highlight": "Jonathan Milan secured 2nd place in the sprint finish",
-            "team_standing": "6th in Team Classification",
-            "team_safety": "All riders finished safely",
-            "pink_jersey": "Filippo Ganna",
-            "points_jersey": "Tim Merlier",
-            "kom_jersey": "Michael Matthews",
-            "youth_jersey": "Remco Evenepoel",
-            "top_story": "Merlier claims victory in thrilling Stage 2 sprint finish",
-            "link": "https://www.cyclingnews.com/races/giro-d-italia-2025/"
-        },
-        3: {
-            "stage_num": "3",
-            "stage_winner": "Biniam Girmay",
-            "team": "Intermarché-Wanty",
-            "second": "Jonathan Milan",
-            "third": "Kaden Groves",
-            "time": "4h 05m 23s",
-            "lidl_trek_highlight": "Jonathan Milan took 2nd place and keeps points jersey",
-            "team_standing": "4th in Team Classification",
-            "team_safety": "All riders finished safely",
-            "pink_jersey": "Filippo Ganna",
-            "points_jersey": "Jonathan Milan",
-            "kom_jersey": "Michael Matthews",
-            "youth_jersey": "Remco Evenepoel",
-            "top_story": "Girmay outsprints Milan in thrilling finish",
-            "link": "https://www.cyclingnews.com/races/giro-d-italia-2025/"
-        },
-        4: {
-            "stage_num": "4",
-            "stage_winner": "Tadej Pogačar",
-            "team": "UAE Team Emirates",
-            "second": "Remco Evenepoel",
-            "third": "Geraint Thomas",
-            "time": "4h 23m 12s",
-            "lidl_trek_highlight": "Giulio Ciccone finished 5th on first mountain stage",
-            "team_standing": "4th in Team Classification",
-            "team_safety": "All riders finished safely",
-            "pink_jersey": "Tadej Pogačar",
-            "points_jersey": "Jonathan Milan",
-            "kom_jersey": "Tadej Pogačar",
-            "youth_jersey": "Remco Evenepoel",
-            "top_story": "Pogačar takes pink with dominant climb",
-            "link": "https://www.cyclingnews.com/races/giro-d-italia-2025/"
-        },
-        5: {
-            "stage_num": "5",
-            "stage_winner": "Tim Merlier",
-            "team": "Soudal Quick-Step",
-            "second": "Jonathan Milan",
-            "third": "Biniam Girmay",
-            "time": "3h 56m 44s",
-            "lidl_trek_highlight": "Milan strengthens grip on points jersey with 2nd place",
-            "team_standing": "4th in Team Classification",
-            "team_safety": "All riders finished safely",
-            "pink_jersey": "Tadej Pogačar",
-            "points_jersey": "Jonathan Milan",
-            "kom_jersey": "Tadej Pogačar",
-            "youth_jersey": "Remco Evenepoel",
-            "top_story": "Merlier edges Milan in sprint finish",
-            "link": "https://www.cyclingnews.com/races/giro-d-italia-2025/"
-        },
-        # Add more stages as needed - for now I've included 5 stages
-        # Additional stages added based on real results, will add more as race progresses
-    }
-    
     # If we don't have data for the current stage (i.e., future stages), 
     # use the previous known stage data with adjusted top story
-    if stage_num not in stage_data:
+    if stage_num not in STATIC_STAGE_DATA:
         # Find the latest stage we have data for
-        latest_stage = max(k for k in stage_data.keys() if k <= stage_num)
-        result = stage_data[latest_stage].copy()
+        latest_stage = max(k for k in STATIC_STAGE_DATA.keys() if k <= stage_num)
+        result = STATIC_STAGE_DATA[latest_stage].copy()
         result["stage_num"] = str(stage_num)
         result["top_story"] = f"Stage {stage_num} results will update soon"
     else:
-        result = stage_data[stage_num].copy()
+        result = STATIC_STAGE_DATA[stage_num].copy()
+        cache_stage_results(result)
     
     # Add the current date
     result["date"] = date_str
     
     return result
 
-def format_giro_message(data):
-    """Format the Giro update into a WhatsApp message"""
-    message = (
-        f"🚴‍♂️ *GiroBot Daily Update – {data['date']}*\n\n"
+def cache_stage_results(data):
+    """Store parsed stage results so inbound queries can be answered without scraping"""
+    stage_num = int(data["stage_num"])
+    cached = data.copy()
+    cached["date"] = get_stage_date_str(stage_num)
+    with stage_results_lock:
+        stage_results_cache[stage_num] = cached
+
+def get_cached_stage_results(stage_num=None):
+    """Return cached results for a stage, or the latest cached stage if none is given"""
+    with stage_results_lock:
+        if not stage_results_cache:
+            return None
+        if stage_num is None:
+            stage_num = max(stage_results_cache.keys())
+        data = stage_results_cache.get(stage_num)
+        return data.copy() if data else None
+
+def warm_stage_results_cache(max_age_days=None):
+    """
+    Fill the results cache with every completed stage, scraping each one and
+    falling back to static data. Runs in the background, never on a request.
+    If max_age_days is given, only stages raced within that many days are tried.
+    """
+    today = datetime.now(pytz.timezone("Australia/Melbourne")).date()
+    for stage_num in get_completed_stages(today):
+        if max_age_days is not None and (today - get_stage_date(stage_num)).days > max_age_days:
+            continue
+        if get_cached_stage_results(stage_num):
+            continue
+        live_data = fetch_giro_stage_results(stage_num)
+        if live_data:
+            cache_stage_results(live_data)
+        elif stage_num in STATIC_STAGE_DATA:
+            cache_stage_results(STATIC_STAGE_DATA[stage_num])
+    with stage_results_lock:
+        cached_count = len(stage_results_cache)
+    print(f"Stage results cache warmed with {cached_count} stages")
+
+def start_cache_warmup(max_age_days=None):
+    """Warm the results cache in its own thread so slow scrapes never delay the scheduler"""
+    def run():
+        try:
+            warm_stage_results_cache(max_age_days)
+        except Exception as e:
+            print(f"Error warming stage results cache: {str(e)}")
+    Thread(target=run, daemon=True).start()
+
+def format_stage_summary(data):
+    """Format the stage podium section shared by the daily update and query replies"""
+    return (
         f"🏁 *Stage {data['stage_num']} Summary*\n"
         f"🏆 Winner: {data['stage_winner']} ({data['team']})\n"
         f"🥈 2nd: {data['second']}\n"
         f"🥉 3rd: {data['third']}\n"
         f"⏱️ Time: {data['time']}\n\n"
-        f"🟣 *Lidl–Trek Highlights*\n"
+    )
+
+def format_lidl_section(data, title="Lidl–Trek Highlights"):
+    """Format the Lidl-Trek section shared by the daily update and query replies"""
+    return (
+        f"🟣 *{title}*\n"
         f"✅ {data['lidl_trek_highlight']}\n"
         f"📊 Team standing: {data['team_standing']}\n"
         f"😎 {data['team_safety']}\n\n"
-        f"🎽 *Jersey Leaders*\n"
+    )
+
+def format_jersey_section(data, title="Jersey Leaders"):
+    """Format the jersey leaders section shared by the daily update and query replies"""
+    return (
+        f"🎽 *{title}*\n"
         f"🩷 Maglia Rosa: {data['pink_jersey']}\n"
         f"🟣 Points: {data['points_jersey']}\n"
         f"🔵 KOM: {data['kom_jersey']}\n"
         f"⚪ Youth: {data['youth_jersey']}\n\n"
-        f"📰 *Top Story*: {data['top_story']}\n"
+    )
+
+def format_giro_message(data):
+    """Format the Giro update into a WhatsApp message"""
+    message = (
+        f"🚴‍♂️ *GiroBot Daily Update – {data['date']}*\n\n"
+        + format_stage_summary(data)
+        + format_lidl_section(data)
+        + format_jersey_section(data)
+        + f"📰 *Top Story*: {data['top_story']}\n"
         f"🔗 Read more: {data['link']}\n\n"
         f"🕗 Next update: 8:00 AM AEST tomorrow."
     )
     return message
 
+def format_stage_message(data):
+    """Format cached stage results into an on-demand WhatsApp reply"""
+    message = (
+        f"🚴‍♂️ *GiroBot – Stage {data['stage_num']} ({data['date']})*\n\n"
+        + format_stage_summary(data)
+        + format_lidl_section(data)
+        + format_jersey_section(data, title=f"Jersey Leaders after Stage {data['stage_num']}")
+        + f"📰 *Top Story*: {data['top_story']}\n"
+        f"🔗 Read more: {data['link']}"
+    )
+    return message
+
+def format_gc_message(data):
+    """Format the jersey leaders from the latest stage into a WhatsApp reply"""
+    message = (
+        format_jersey_section(data, title=f"Jersey Leaders after Stage {data['stage_num']}")
+        + f"🔗 Read more: {data['link']}"
+    )
+    return message
+
+def format_lidl_message(data):
+    """Format the Lidl-Trek highlights from the latest stage into a WhatsApp reply"""
+    message = (
+        format_lidl_section(data, title=f"Lidl–Trek Highlights – Stage {data['stage_num']}")
+        + f"🔗 Read more: {data['link']}"
+    )
+    return message
+
+QUERY_HELP_MESSAGE = (
+    "🚴‍♂️ *GiroBot commands*\n"
+    "• *stage 7* – results for a stage\n"
+    "• *stage* – latest stage results\n"
+    "• *gc* – jersey leaders after the latest available stage\n"
+    "• *lidl* – Lidl–Trek highlights from the latest available stage"
+)
+
+NO_RESULTS_MESSAGE = "No stage results are available right now. Please try again later."
+
+def format_missing_stage_message(stage_num):
+    """Explain why a requested stage has no cached results"""
+    if stage_num not in GIRO_STAGES.values():
+        return f"There is no Stage {stage_num} – the Giro has {len(GIRO_STAGES)} stages."
+    today = datetime.now(pytz.timezone("Australia/Melbourne")).date()
+    if stage_num not in get_completed_stages(today):
+        return f"Stage {stage_num} hasn't been raced yet ({get_stage_date_str(stage_num)})."
+    return f"Stage {stage_num} results aren't available right now. Please try again later."
+
+def format_stale_note(data):
+    """Warn when the latest cached stage is behind the latest completed stage"""
+    today = datetime.now(pytz.timezone("Australia/Melbourne")).date()
+    completed_stages = get_completed_stages(today)
+    if completed_stages and int(data["stage_num"]) < completed_stages[-1]:
+        return (
+            f"\n\n⚠️ Stage {completed_stages[-1]} results aren't available yet – "
+            f"showing Stage {data['stage_num']}."
+        )
+    return ""
+
+def answer_giro_query(text):
+    """Build a reply for an inbound WhatsApp command using only cached results"""
+    words = text.strip().lower().split()
+    if not words:
+        return QUERY_HELP_MESSAGE
+    command = words[0]
+    
+    if command == "stage":
+        if len(words) > 1 and not re.fullmatch(r"[0-9]+", words[1]):
+            return QUERY_HELP_MESSAGE
+        stage_num = int(words[1]) if len(words) > 1 else None
+        data = get_cached_stage_results(stage_num)
+        if not data:
+            if stage_num is None:
+                return NO_RESULTS_MESSAGE
+            return format_missing_stage_message(stage_num)
+        if stage_num is None:
+            return format_stage_message(data) + format_stale_note(data)
+        return format_stage_message(data)
+    
+    if command in ("gc", "lidl"):
+        data = get_cached_stage_results()
+        if not data:
+            return NO_RESULTS_MESSAGE
+        if command == "gc":
+            return format_gc_message(data) + format_stale_note(data)
+        return format_lidl_message(data) + format_stale_note(data)
+    
+    return QUERY_HELP_MESSAGE
+
+def prune_query_timestamps(now):
+    """Drop senders with no queries left in the current window. Caller holds the lock."""
+    for sender in list(query_timestamps):
+        timestamps = query_timestamps[sender]
+        while timestamps and now - timestamps[0] > QUERY_RATE_WINDOW:
+            timestamps.popleft()
+        if not timestamps:
+            del query_timestamps[sender]
+
+def allow_query(sender):
+    """Sliding-window rate limiter for inbound queries, tracked per sender"""
+    now = time.monotonic()
+    with query_timestamps_lock:
+        if len(query_timestamps) >= MAX_TRACKED_SENDERS:
+            prune_query_timestamps(now)
+        timestamps = query_timestamps.setdefault(sender, deque())
+        while timestamps and now - timestamps[0] > QUERY_RATE_WINDOW:
+            timestamps.popleft()
+        if len(timestamps) >= QUERY_RATE_LIMIT:
+            return False
+        timestamps.append(now)
+        return True
+
 def send_girobot_update():
     """Send the Giro update via WhatsApp"""
     try:
@@ -357,6 +568,9 @@ def scheduler():
     aest = pytz.timezone("Australia/Melbourne")
     print(f"GiroBot scheduler started. Will send updates daily at 8:00 AM AEST.")
     
+    # Warm the results cache so inbound queries can be answered before the first send
+    start_cache_warmup()
+    
     while True:
         now = datetime.now(aest)
         target_time = now.replace(hour=8, minute=0, second=0, microsecond=0)
@@ -373,6 +587,8 @@ def scheduler():
         
         time.sleep(wait_seconds)
         send_girobot_update()
+        # Pick up recent stages whose scrape failed during earlier warm-ups
+        start_cache_warmup(max_age_days=RECENT_STAGE_DAYS)
 
 @app.route('/')
 def home():
@@ -401,6 +617,7 @@ def home():
                 <ul>
                     <li><a href="/trigger">/trigger</a> - Send a test update immediately</li>
                     <li><a href="/health">/health</a> - Check service health</li>
+                    <li>/whatsapp - Twilio webhook for inbound queries ("stage 7", "gc", "lidl")</li>
                 </ul>
                 <div class="footer">
                     <p>GiroBot Service · Running on Replit</p>
@@ -457,6 +674,25 @@ def manual_trigger():
         </html>
         """
 
+@app.route('/whatsapp', methods=['POST'])
+def whatsapp_query():
+    """Twilio inbound-message webhook, answered from cached stage results"""
+    signature = request.headers.get('X-Twilio-Signature', '')
+    if not request_validator.validate(request.url, request.form, signature):
+        print("Rejected inbound WhatsApp request with invalid Twilio signature")
+        return "Forbidden", 403
+    
+    sender = request.form.get('From', '')
+    body = request.form.get('Body', '')
+    
+    # Over-limit senders get an empty response so bursts don't cost outbound messages
+    response = MessagingResponse()
+    if allow_query(sender):
+        response.message(answer_giro_query(body))
+    else:
+        print(f"Rate limit hit for {sender}")
+    return str(response), 200, {'Content-Type': 'application/xml'}
+
 @app.route('/health')
 def health_check():
     """Health check endpoint"""